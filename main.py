@@ -1,233 +1,691 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from lxml import etree, html
+import os
 import re
+import math
 import csv
 import time
+import codecs
+import hashlib
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+import multiprocessing
+
+# =============================================================================
+# HTTP SESSION
+# =============================================================================
+# One shared session keeps the connection to openlibrary.org alive between
+# requests instead of paying a new TCP+TLS handshake for every page.
+REQUEST_TIMEOUT = 10
+
+SESSION = requests.Session()
+SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+})
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=64,
+    # urllib3 would otherwise sleep out a 429/503 Retry-After itself, hidden
+    # from LIMITER; fetch_bytes retries those statuses instead
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[500, 502, 504],
+                      respect_retry_after_header=False)
+))
+
+# Requests per second allowed to each host, and how many may be sent in a burst
+RATE_LIMIT = 4.0
+RATE_BURST = 4
+# "Slow down" statuses are retried through LIMITER rather than the session's
+# Retry, so their Retry-After pauses every thread fetching from that host
+THROTTLE_STATUSES = (429, 503)
+THROTTLE_RETRIES = 3
+THROTTLE_BACKOFF = 0.5
+
+def _header_delay(value):
+    """Seconds to wait from a header holding seconds, an epoch timestamp or an HTTP date"""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+    # Large values are absolute epoch timestamps rather than a number of seconds
+    return max(0.0, seconds - time.time()) if seconds > 1e9 else seconds
+
+class HostRateLimiter:
+    """Thread-safe token bucket per host, throttled further by rate-limit response headers"""
+
+    def __init__(self, rate = RATE_LIMIT, burst = RATE_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets = {}  # host -> (tokens, last refill time, blocked until)
+
+    def acquire(self, host):
+        """Block until a request to host fits in its budget"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, updated, blocked_until = self._buckets.get(host, (self.burst, now, 0.0))
+                tokens = min(self.burst, tokens + (now - updated) * self.rate)
+                wait = blocked_until - now
+                if wait <= 0:
+                    if tokens >= 1:
+                        self._buckets[host] = (tokens - 1, now, blocked_until)
+                        return
+                    wait = (1 - tokens) / self.rate
+                self._buckets[host] = (tokens, now, blocked_until)
+            time.sleep(wait)
+
+    def update(self, host, headers, default_delay = None):
+        """Pause host when a response says so via Retry-After or X-RateLimit-Remaining/Reset.
+
+        default_delay is used when the headers give no delay (e.g. a 429 without Retry-After).
+        """
+        delay = _header_delay(headers.get('Retry-After'))
+        if delay is None and headers.get('X-RateLimit-Remaining') == '0':
+            delay = _header_delay(headers.get('X-RateLimit-Reset'))
+        if delay is None:
+            delay = default_delay
+        if not delay:
+            return
+        with self._lock:
+            now = time.monotonic()
+            _, _, blocked_until = self._buckets.get(host, (0, now, 0.0))
+            self._buckets[host] = (0, now, max(blocked_until, now + delay))
+
+LIMITER = HostRateLimiter()
+
+# Charset assumed when neither the response's Content-Type nor the page's <meta> declares one
+DEFAULT_ENCODING = 'utf-8'
+# Bytes at the start of a page searched for its <meta> charset and, before caching it, its document tag
+SNIFF_BYTES = 1024
+
+# Fetched pages are kept on disk with their charset, keyed by a hash of their
+# URL, and reused while younger than CACHE_MAX_AGE seconds
+CACHE_DIR = '.page_cache'
+CACHE_MAX_AGE = 7 * 24 * 3600
+
+# Number of book pages fetched concurrently (kept low to respect openlibrary.org)
+MAX_WORKERS = 16
+# Upper bound on submitted but not yet collected fetches while streaming input rows
+MAX_PENDING = 128
+# Results shown per openlibrary.org search page, used to turn the hit count into a page count
+RESULTS_PER_PAGE = 20
+
+# =============================================================================
+# OUTPUT
+# =============================================================================
+# Columns of the search and detailed CSV files; list values (authors, subjects)
+# are written in Python list form, which the notebook reads with literal_eval
+SEARCH_FIELDS = ['title', 'work_key', 'book_url']
+DETAIL_FIELDS = [
+    'source_url', 'title', 'authors', 'first_published', 'publish_date', 'subjects', 'language',
+    'isbn', 'edition_count', 'rating', 'number_of_ratings', 'pages', 'original_title', 'work_key',
+]
+CSV_BUFFER_SIZE = 1 << 20
+
+# =============================================================================
+# PATTERNS
+# =============================================================================
+_YEAR_RE = re.compile(r'\((\d{4})\)')
+_EDITIONS_RE = re.compile(r'(\d+)\s*editions?\b', re.I)
+_RATING_RE = re.compile(r'(\d\.\d+)\s*\((\d+)\s*ratings?\)')
+_CHARSET_RE = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+# <meta charset="..."> or <meta http-equiv="Content-Type" content="...; charset=...">
+_META_CHARSET_RE = re.compile(rb'<meta\b[^>]*?charset\s*=\s*["\']?([\w.:-]+)', re.I)
+# Opening tag of an HTML document, looked for in the first SNIFF_BYTES of a page
+_DOCUMENT_RE = re.compile(rb'<(?:html|body)\b', re.I)
+
+def _has_class(name):
+    """XPath predicate matching a single token of the class attribute (like BeautifulSoup's class_)"""
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+# XPath queries are compiled once here rather than on every call
+# Covers "edition", "Edition" and "EDITION" to match _EDITIONS_RE's re.I
+# without the cost of lower-casing every text node with translate()
+_XP_EDITION_TEXT = etree.XPath('//text()[contains(., "dition") or contains(., "DITION")]')
+# Search result containers, tried in order until one matches
+_XP_RESULT_ITEMS = (
+    etree.XPath(f'//div[{_has_class("searchResultItem")}]'),
+    etree.XPath(f'//div[{_has_class("book-item")}]'),
+    etree.XPath(f'//li[{_has_class("searchResultItem")}]'),
+)
+# (...)[1] returns a single node instead of building proxies for every match
+_XP_RESULT_TITLE_LINK = etree.XPath('(.//h3//a)[1]')
+_XP_RESULT_LINK = etree.XPath(f'(.//a[{_has_class("results")}])[1]')
+_XP_RESULT_STATS = etree.XPath(f'(//*[{_has_class("search-results-stats")}])[1]')
+_NUMBER_RE = re.compile(r'\d[\d,]*')
+
+# Subject links are site-relative, or absolute on openlibrary.org
+_SUBJECT_HREF_PREFIXES = ('/subjects/', 'https://openlibrary.org/subjects/')
+
+# Tags visited by the single extraction pass in extract_fields
+_FIELD_TAGS = ('div', 'h1', 'span', 'a', 'dd')
+# (tag, itemprop) pairs of the schema.org/Book properties collected by extract_fields
+_BOOK_PROPS = {
+    ('span', 'name'), ('span', 'datePublished'), ('span', 'inLanguage'),
+    ('dd', 'isbn'), ('span', 'ratingValue'), ('span', 'numberOfPages'),
+}
 
 # =============================================================================
 # CORE UTILITIES
 # =============================================================================
-def save_to_csv(data, filename):
+class CsvWriter:
+    """Write dict rows to a CSV file one at a time as a fixed list of columns.
+
+    Without fields, the columns are taken from the keys of the first row.
+    """
+
+    def __init__(self, filename, fields = None, flush_every = 100, append = False):
+        self.filename = filename
+        self.fields = list(fields) if fields else None
+        self.flush_every = flush_every
+        self.count = 0
+        # Appending to a non-empty file continues it without writing a second header
+        self._append = append and os.path.exists(filename) and os.path.getsize(filename) > 0
+        if self._append:
+            with open(filename, 'r', newline='', encoding='utf-8') as f:
+                header = next(csv.reader(f), [])
+            if self.fields is None:
+                self.fields = header
+            elif header != self.fields:
+                # Appending would put values under the wrong columns
+                raise ValueError(f"Cannot append to {filename}: its columns {header} differ from {self.fields}")
+        self._header_written = self._append
+        self._file = None
+        self._writer = None
+
+    def __enter__(self):
+        # A large buffer turns many small row writes into few system calls
+        self._file = open(self.filename, 'a' if self._append else 'w', newline='', encoding='utf-8',
+                          buffering=CSV_BUFFER_SIZE)
+        self._writer = csv.writer(self._file)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+
+    def _start(self, row):
+        """Fix the columns and write the header before the first row"""
+        if self.fields is None:
+            self.fields = list(row.keys())
+        if not self._header_written:
+            self._writer.writerow(self.fields)
+            self._header_written = True
+
+    def write(self, row):
+        """Append one row, flushing periodically so an interrupted crawl keeps its progress"""
+        if self.count == 0:
+            self._start(row)
+        self._writer.writerow([row.get(field, '') for field in self.fields])
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self._file.flush()
+
+    def write_rows(self, rows):
+        """Append a batch of rows in a single writerows call"""
+        if not rows:
+            return
+        if self.count == 0:
+            self._start(rows[0])
+        self._writer.writerows([row.get(field, '') for field in self.fields] for row in rows)
+        self.count += len(rows)
+
+def save_to_csv(data, filename, fields = None):
     """Save data to CSV file"""
     if not data:
         print("No data to save")
         return
     
-    with open(filename, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=data[0].keys())
-        writer.writeheader()
-        writer.writerows(data)
+    with CsvWriter(filename, fields) as writer:
+        writer.write_rows(data)
     print(f"Data saved to {filename}")
 
-def get_page(url):
-    """Fetch webpage and return BeautifulSoup object"""
+def _lookup_charset(name):
+    """Canonical codec name for a declared charset, or None if Python does not know it"""
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        return BeautifulSoup(response.content, 'html.parser')
-    except requests.RequestException as e:
-        print(f"Error fetching {url}: {e}")
+        return codecs.lookup(name).name
+    except LookupError:
         return None
 
-# =============================================================================
-# PAGE-SPECIFIC CRAWLERS
-# =============================================================================
-def crawl_book_details_from_url(book_url):
-    """Extract detailed book information from a specific book URL"""
-    soup = get_page(book_url)
-    if not soup:
-        return {}
+def _response_charset(response):
+    """Charset declared in the response's Content-Type, else in the page's <meta>, else DEFAULT_ENCODING"""
+    match = _CHARSET_RE.search(response.headers.get('Content-Type', ''))
+    charset = _lookup_charset(match.group(1)) if match else None
+    if charset is None:
+        # The page's own declaration, as a browser would read it when the header has none
+        match = _META_CHARSET_RE.search(response.content, 0, SNIFF_BYTES)
+        charset = _lookup_charset(match.group(1).decode('ascii')) if match else None
+    return charset or DEFAULT_ENCODING
+
+def _parse_html(content, encoding):
+    """Parse page bytes into an lxml HTML tree, decoding them with the given charset.
+
+    Returns None when there is no document to parse (e.g. an empty or comment-only body).
+    """
+    # A parser per call is cheap, and lxml parsers must not be shared between threads
+    try:
+        return html.fromstring(content, parser=html.HTMLParser(encoding=encoding))
+    except etree.ParserError:
+        return None
+
+def _cache_path(url):
+    """Path of the on-disk copy of a fetched page"""
+    return os.path.join(CACHE_DIR, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.page')
+
+def _read_cached_page(url):
+    """Return the cached (content, charset) for url, or None if missing or expired"""
+    path = _cache_path(url)
+    try:
+        if time.time() - os.path.getmtime(path) > CACHE_MAX_AGE:
+            return None
+        with open(path, 'rb') as f:
+            # The first line holds the charset, the rest is the page as received
+            encoding, _, content = f.read().partition(b'\n')
+        return content, encoding.decode('ascii')
+    except (OSError, UnicodeDecodeError):
+        return None
+
+def _write_cached_page(url, content, encoding):
+    """Store page content and charset for url; written to a temporary file first so readers never see partial pages"""
+    path = _cache_path(url)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            f.write(encoding.encode('ascii') + b'\n')
+            f.write(content)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Error caching {url}: {e}")
+
+def fetch_bytes(url):
+    """Fetch webpage (or its cached copy) and return its raw content and charset, or None on failure"""
+    page = _read_cached_page(url)
+    if page is None:
+        host = urlsplit(url).netloc
+        try:
+            for attempt in range(THROTTLE_RETRIES + 1):
+                LIMITER.acquire(host)
+                response = SESSION.get(url, timeout=REQUEST_TIMEOUT)
+                throttled = response.status_code in THROTTLE_STATUSES
+                # Without rate-limit headers, back off exponentially like the session's Retry
+                LIMITER.update(host, response.headers, THROTTLE_BACKOFF * 2 ** attempt if throttled else None)
+                if not throttled:
+                    break
+            response.raise_for_status()
+        except requests.RequestException as e:
+            print(f"Error fetching {url}: {e}")
+            return None
+        # Keep the raw bytes and let lxml decode them with the declared
+        # charset; response.text would add a redundant decode in Python
+        page = (response.content, _response_charset(response))
+        # Only cache pages that start an HTML document; an empty or broken
+        # body is fetched again next time instead of being replayed for a week.
+        # A byte sniff rather than a parse keeps parsing out of the fetch threads
+        if _DOCUMENT_RE.search(page[0], 0, SNIFF_BYTES):
+            _write_cached_page(url, *page)
+    return page
+
+def get_page(url):
+    """Fetch webpage and return the parsed lxml HTML tree"""
+    page = fetch_bytes(url)
+    if page is None:
+        return None
+    return _parse_html(*page)
+
+def read_done_urls(csv_file, url_column = 'source_url'):
+    """Return the URLs already present in an output CSV from a previous run"""
+    if not os.path.exists(csv_file):
+        return set()
+    with open(csv_file, 'r', newline='', encoding='utf-8') as f:
+        return {row[url_column] for row in csv.DictReader(f) if row.get(url_column)}
+
+def _bounded_map(executor, fn, items, max_pending = MAX_PENDING):
+    """Lazily map fn over items on executor, yielding (item, result) pairs in order.
+
+    Unlike executor.map, items are consumed as results are taken, with at most
+    max_pending calls submitted but not yet collected.
+    """
+    pending = deque()
+    for item in items:
+        pending.append((item, executor.submit(fn, item)))
+        if len(pending) >= max_pending:
+            item, future = pending.popleft()
+            yield item, future.result()
+    while pending:
+        item, future = pending.popleft()
+        yield item, future.result()
+
+def _first(node, xpath):
+    """Return the first element matched by a compiled XPath, or None"""
+    matches = xpath(node)
+    return matches[0] if matches else None
+
+def _inside(elem, container):
+    """Check whether container is an ancestor of elem"""
+    return any(ancestor is container for ancestor in elem.iterancestors())
+
+def _string(elem):
+    """Return the text of an element including its children, reading .text directly when it has none"""
+    # lxml's .text stops at the first child, so <span>Dune <em>Messiah</em></span> would give "Dune"
+    if len(elem):
+        return elem.text_content()
+    return elem.text or ""
+
+def _parse_rating(rating_text):
+    """Parse a rating like "3.8 (8 ratings)" into (3.8, 8), or None if there is no rating"""
+    # Fast path for the exact format openlibrary uses; anything else goes
+    # through the regex so both accept the same texts
+    value, _, count = rating_text.partition(' (')
+    if count.endswith(' ratings)'):
+        count = count[:-9]
+    elif count.endswith(' rating)'):
+        count = count[:-8]
+    if (len(value) > 2 and value[1] == '.' and value[0].isdecimal() and value[2:].isdecimal()
+            and count.isdecimal()):
+        return float(value), int(count)
+    
+    rating_match = _RATING_RE.search(rating_text)
+    if rating_match:
+        return float(rating_match.group(1)), int(rating_match.group(2))
+    return None
+
+def extract_fields(tree):
+    """Extract the book fields from a parsed book page in a single pass over its elements"""
+    book = authors_div = heading = first_pub_span = None
+    book_props = {}  # first element per itemprop inside the schema.org/Book container
+    page_props = {}  # first element per itemprop anywhere, used when there is no container
+    authors = []
+    subjects = []
     
-    book_details = {'source_url': book_url}
+    # One C-level walk over the tags of interest, dispatching on tag and
+    # attributes, instead of a separate tree search per field
+    for elem in tree.iter(*_FIELD_TAGS):
+        tag = elem.tag
+        if tag == 'a':
+            if elem.get('href', '').startswith(_SUBJECT_HREF_PREFIXES):
+                subjects.append(elem.text_content().strip())
+            elif authors_div is not None and elem.get('itemprop') == 'author' and _inside(elem, authors_div):
+                # Author links only within ancestor with class 'work-title-and-author desktop'
+                authors.append(elem.text_content().strip())
+        elif tag == 'div':
+            if book is None and elem.get('itemscope') is not None and 'schema.org/Book' in elem.get('itemtype', ''):
+                book = elem
+            if authors_div is None and elem.get('class') == 'work-title-and-author desktop':
+                authors_div = elem
+        elif tag == 'h1':
+            if heading is None:
+                heading = elem
+        else:
+            classes = elem.get('class', '').split()
+            if tag == 'span' and first_pub_span is None and 'first-published-date' in classes:
+                first_pub_span = elem
+            itemprop = elem.get('itemprop')
+            if (tag, itemprop) in _BOOK_PROPS and itemprop not in book_props:
+                # <span class="edition-pages" itemprop="numberOfPages">
+                if itemprop == 'numberOfPages' and 'edition-pages' not in classes:
+                    continue
+                page_props.setdefault(itemprop, elem)
+                if book is not None and _inside(elem, book):
+                    book_props[itemprop] = elem
+    
+    props = book_props if book is not None else page_props
+    fields = {}
     
     # Title
-    title_elem = soup.find('span', itemprop='name')
-    if not title_elem:
-        title_elem = soup.find('h1')
-    book_details['title'] = title_elem.get_text().strip() if title_elem else ""
-    
-    # Authors
-    # Find author links only within ancestor with class 'work-title-and-author desktop'
-    author_links = []
-    ancestor = soup.find('div', class_='work-title-and-author desktop')
-    if ancestor:
-        author_links = ancestor.find_all('a', itemprop='author')
-    book_details['authors'] = [link.get_text().strip() for link in author_links]
-
+    title_elem = props.get('name', heading)
+    fields['title'] = _string(title_elem).strip() if title_elem is not None else ""
+    fields['authors'] = authors
+    
     # First published date from <span class="first-published-date" title="First published in YYYY">
-    first_pub_span = soup.find('span', class_='first-published-date')
-    if first_pub_span and first_pub_span.get_text():
+    first_pub_text = _string(first_pub_span) if first_pub_span is not None else None
+    if first_pub_text:
         # Extract year from text like "(1924)"
-        year_match = re.search(r'\((\d{4})\)', first_pub_span.get_text())
-        if year_match:
-            book_details['first_published'] = year_match.group(1)
-        else:
-            book_details['first_published'] = first_pub_span.get_text().strip()
+        year_match = _YEAR_RE.search(first_pub_text)
+        fields['first_published'] = year_match.group(1) if year_match else first_pub_text.strip()
     else:
-        book_details['first_published'] = ""
+        fields['first_published'] = ""
     
-    # Publish date from <span itemprop="datePublished">
-    publish_span = soup.find('span', itemprop='datePublished')
-    if publish_span:
-        book_details['publish_date'] = publish_span.get_text().strip()
-    else:
-        book_details['publish_date'] = ""
+    publish_span = props.get('datePublished')
+    fields['publish_date'] = publish_span.text_content().strip() if publish_span is not None else ""
+    fields['subjects'] = subjects
+    language = props.get('inLanguage')
+    fields['language'] = language.text_content().strip() if language is not None else ""
+    isbn_dd = props.get('isbn')
+    fields['isbn'] = _string(isbn_dd).strip() if isbn_dd is not None else ""
     
-    # Subjects/Tags
-    subject_links = soup.find_all('a', href=re.compile(r'/subjects/'))
-    book_details['subjects'] = [link.get_text().strip() for link in subject_links]
+    # Edition count - match against single text nodes (e.g. "210 editions");
+    # XPath preselects the few nodes mentioning "edition" so the regex only sees those
+    edition_match = None
+    for text in _XP_EDITION_TEXT(tree):
+        edition_match = _EDITIONS_RE.search(text)
+        if edition_match:
+            break
+    fields['edition_count'] = int(edition_match.group(1)) if edition_match else 0
     
-    # Languages
-    language = soup.find('span', {'itemprop': 'inLanguage'})
-    if language:
-        book_details['language'] = language.get_text().strip()
-    else:
-        book_details['language'] = ""
+    # Rating and number of ratings from string like "3.8 (8 ratings)"
+    fields['rating'] = 0.0
+    fields['number_of_ratings'] = 0
+    # Many books have no rating span at all, in which case nothing is parsed
+    rating_span = props.get('ratingValue')
+    if rating_span is not None:
+        rating = _parse_rating(rating_span.text_content().strip())
+        if rating:
+            fields['rating'], fields['number_of_ratings'] = rating
     
-    # ISBN - look for specific HTML structure first
-    book_details['isbn'] = ""
+    pages_span = props.get('numberOfPages')
+    pages_text = _string(pages_span).strip() if pages_span is not None else ""
+    fields['pages'] = int(pages_text) if pages_text.isdigit() else 0
     
-    # Look for dd with itemprop="isbn"
-    isbn_dd = soup.find('dd', {'itemprop': 'isbn'})
-    if isbn_dd:
-        book_details['isbn'] = isbn_dd.get_text().strip()
-        
-    # Edition count - be more specific with regex
-    edition_match = re.search(r'(\d+)\s*editions?\b', soup.get_text(), re.I)
-    book_details['edition_count'] = int(edition_match.group(1)) if edition_match else 0
-    
-    # Rating - look for various rating patterns
-    book_details['rating'] = 0.0
-    book_details['number_of_ratings'] = 0
-
-    # Look for itemprop="ratingValue" span
-    rating_span = soup.find('span', {'itemprop': 'ratingValue'})
-    if rating_span:
-        rating_text = rating_span.get_text().strip()
-        # Extract rating and number of ratings from string like "3.8 (8 ratings)"
-        rating_match = re.search(r'(\d\.\d+)\s*\((\d+)\s*ratings?\)', rating_text)
-        if rating_match:
-            book_details['rating'] = float(rating_match.group(1))
-            book_details['number_of_ratings'] = int(rating_match.group(2))
-    
-    # Pages - look for page count patterns
-    book_details['pages'] = 0
-    # Look for <span class="edition-pages" itemprop="numberOfPages">
-    pages_span = soup.find('span', class_='edition-pages', itemprop='numberOfPages')
-    if pages_span and pages_span.get_text().strip().isdigit():
-        book_details['pages'] = int(pages_span.get_text().strip())
-        
-    return book_details
+    return fields
 
-def crawl_book_details_from_csv(csv_file, url_column = 'book_url'):
-    """Extract book details from URLs in a CSV file"""
+# =============================================================================
+# PAGE-SPECIFIC CRAWLERS
+# =============================================================================
+def parse_book_details(page, book_url):
+    """Extract detailed book information from a (content, charset) page returned by fetch_bytes"""
+    tree = _parse_html(*page) if page is not None else None
+    if tree is None:
+        return {}
+    
+    return {'source_url': book_url, **extract_fields(tree)}
+
+def _parse_fetched_row(url_column, fetched):
+    """Parse a (row, page) pair from the fetch stage; runs in the parsing processes"""
+    row, page = fetched
+    return parse_book_details(page, row[url_column])
+
+def crawl_book_details_from_url(book_url):
+    """Extract detailed book information from a specific book URL"""
+    return parse_book_details(fetch_bytes(book_url), book_url)
+
+def _crawl_rows(fetcher, parser, rows, url_column):
+    """Yield (row, details) pairs in CSV order, parsing in the parser processes when given"""
+    if parser is None:
+        # Parse in the fetching threads
+        yield from _bounded_map(fetcher, lambda row: crawl_book_details_from_url(row[url_column]), rows)
+        return
+    
+    fetched = _bounded_map(fetcher, lambda row: fetch_bytes(row[url_column]), rows)
+    for (row, _), details in _bounded_map(parser, partial(_parse_fetched_row, url_column), fetched):
+        yield row, details
+
+def crawl_book_details_from_csv(csv_file, url_column = 'book_url', *, output_file, max_workers = MAX_WORKERS,
+                                resume = True, parse_workers = None):
+    """Extract book details from URLs in a CSV file and write them to output_file as they arrive.
+
+    Pages are fetched and parsed by max_workers threads. With parse_workers (e.g.
+    os.cpu_count()) parsing runs in that many separate processes instead, which
+    needs the calling script to use an if __name__ == "__main__" guard.
+    With resume, URLs already in output_file are skipped and new rows are appended to it.
+    """
     try:
-        # Read CSV file using built-in csv module
-        book_details = []
-        
-        with open(csv_file, 'r', encoding='utf-8') as f:
+        f = open(csv_file, 'r', encoding='utf-8')
+    except OSError as e:
+        print(f"Error reading CSV file: {e}")
+        return 0
+    
+    writer = None
+    
+    # Read CSV file using built-in csv module
+    with f:
+        try:
             reader = csv.DictReader(f)
-            rows = list(reader)  # Convert to list to get count
             
-            if url_column not in reader.fieldnames:
+            if url_column not in (reader.fieldnames or []):
                 print(f"Column '{url_column}' not found in CSV. Available columns: {reader.fieldnames}")
-                return []
+                return 0
+            
+            print(f"Processing book URLs from {csv_file}...")
             
-            total_urls = len(rows)
-            print(f"Processing {total_urls} book URLs from {csv_file}...")
+            # Resume from checkpoint: skip books written by a previous run
+            done_urls = read_done_urls(output_file) if resume else set()
+            if done_urls:
+                print(f"Skipping {len(done_urls)} books already in {output_file}")
+            # Short rows have no URL (None) and are skipped along with empty ones
+            rows = (row for row in reader if row[url_column] and row[url_column] not in done_urls)
             
-            for idx, row in enumerate(rows):
-                url = row[url_column]
-                print(f"Processing {idx+1}/{total_urls}: {url}")
+            # Fetching is I/O-bound, so threads sharing SESSION overlap the
+            # network waits. Rows are streamed through and come back in CSV
+            # order, written here by a single writer. Parse processes are
+            # spawned rather than forked because fetch threads are already
+            # running when the first one starts.
+            with ExitStack() as stack:
+                fetcher = stack.enter_context(ThreadPoolExecutor(max_workers=max_workers))
+                parser = None
+                if parse_workers:
+                    parser = stack.enter_context(ProcessPoolExecutor(
+                        max_workers=parse_workers, mp_context=multiprocessing.get_context('spawn')))
+                writer = stack.enter_context(CsvWriter(output_file, DETAIL_FIELDS, append=resume))
                 
-                details = crawl_book_details_from_url(url)
-                if details:
-                    # Add original CSV data to details
-                    details['original_title'] = row.get('title', '')
-                    details['work_key'] = row.get('work_key', '')
-                    book_details.append(details)
+                for idx, (row, details) in enumerate(_crawl_rows(fetcher, parser, rows, url_column), 1):
+                    print(f"Processed {idx}: {row[url_column]}")
+                    
+                    if details:
+                        # Add original CSV data to details
+                        details['original_title'] = row.get('title', '')
+                        details['work_key'] = row.get('work_key', '')
+                        writer.write(details)
         
-        print(f"Successfully extracted details for {len(book_details)} books")
-        return book_details
-        
-    except Exception as e:
-        print(f"Error reading CSV file: {e}")
-        return []
+        except (csv.Error, UnicodeDecodeError) as e:
+            # Rows written before the error are already in output_file
+            print(f"Error reading CSV file: {e}")
+            return writer.count if writer is not None else 0
+    
+    print(f"Successfully extracted details for {writer.count} books into {output_file}")
+    return writer.count
 
-def crawl_openlibrary_books_by_subject(subject, max_pages = 3):
-    """Extract books for a specific subject from OpenLibrary search API with paging"""
-    books = []
+def _search_page_url(subject, page):
+    """Build search URL with page parameter subject_key:"science_fiction" edition_count:{5 TO *}"""
+    return f"https://openlibrary.org/search?q=subject_key%3A%22{subject}%22+edition_count%3A%7B5+TO+*%7D&page={page}"
+
+def _total_hits(tree):
+    """Total number of hits reported on a search results page (e.g. "13,592 hits"), or None"""
+    stats = _first(tree, _XP_RESULT_STATS)
+    if stats is None:
+        return None
+    numbers = [int(number.replace(',', '')) for number in _NUMBER_RE.findall(stats.text_content())]
+    # In "Showing 1 - 20 of 13,592" style texts the total is the largest number
+    return max(numbers) if numbers else None
+
+def parse_search_results(tree):
+    """Extract title, work key and book URL for each result on a search results page"""
+    page_books = []
     
-    for page in range(1, max_pages + 1):
-        print(f"Fetching page {page} for subject '{subject}'...")
-        
-        # Build search URL with page parameter subject_key:"science_fiction" edition_count:{5 TO *}
-        search_url = f"https://openlibrary.org/search?q=subject_key%3A%22{subject}%22+edition_count%3A%7B5+TO+*%7D&page={page}"
+    # Look for book results - they're typically in divs with class 'searchResultItem',
+    # otherwise try the alternative selectors
+    book_items = []
+    for xpath in _XP_RESULT_ITEMS:
+        book_items = xpath(tree)
+        if book_items:
+            break
+    
+    for item in book_items:
+        # Book title and link
+        title_link = _first(item, _XP_RESULT_TITLE_LINK)
+        if title_link is None:
+            title_link = _first(item, _XP_RESULT_LINK)
         
-        soup = get_page(search_url)
-        if not soup:
-            print(f"Failed to fetch page {page}")
+        if title_link is None:
             continue
+            
+        title = title_link.text_content().strip()
         
-        page_books = []
-        
-        # Look for book results - they're typically in divs with class 'searchResultItem'
-        book_items = soup.find_all('div', class_='searchResultItem')
-        
-        # If no searchResultItem, try alternative selectors
-        if not book_items:
-            book_items = soup.find_all('div', class_='book-item')
-        if not book_items:
-            book_items = soup.find_all('li', class_='searchResultItem')
+        # Get the full URL with edition key if present
+        href = title_link.get('href', '')
+        book_url = f"https://openlibrary.org{href}"
         
-        # If no books found on this page, we might have reached the end
-        if not book_items:
-            print(f"No books found on page {page}, stopping pagination")
-            break
+        # Extract work key from URL (before any query parameters)
+        work_key = ""
+        if '/works/' in href:
+            # Extract work key (e.g., OL27448W from /works/OL27448W/The_Lord_of_the_Rings)
+            work_part = href.split('/works/')[-1]
+            work_key = work_part.split('/')[0].split('?')[0]  # Get just the work key part
         
-        for item in book_items:
-            # Book title and link
-            title_link = item.find('h3').find('a') if item.find('h3') else None
-            if not title_link:
-                title_link = item.find('a', class_='results')
-            
-            if not title_link:
+        page_books.append({
+            'title': title,
+            'work_key': work_key,
+            'book_url': book_url
+        })
+    
+    return page_books
+
+def crawl_openlibrary_books_by_subject(subject, max_pages = 3, max_workers = MAX_WORKERS):
+    """Extract books for a specific subject from OpenLibrary search pages.
+
+    The number of pages comes from the hit count on page 1, capped at max_pages
+    (None for all pages); the remaining pages are then fetched concurrently.
+    """
+    print(f"Fetching page 1 for subject '{subject}'...")
+    tree = get_page(_search_page_url(subject, 1))
+    if tree is None:
+        print("Failed to fetch page 1")
+        return []
+    
+    books = parse_search_results(tree)
+    print(f"Found {len(books)} books on page 1")
+    
+    total_hits = _total_hits(tree)
+    if not books:
+        num_pages = 1
+    elif total_hits is None:
+        # No hit count on the page, so fall back to the requested number of pages
+        num_pages = max_pages or 1
+    else:
+        num_pages = math.ceil(total_hits / RESULTS_PER_PAGE)
+        if max_pages is not None:
+            num_pages = min(num_pages, max_pages)
+    
+    if num_pages > 1:
+        print(f"Fetching pages 2-{num_pages} for subject '{subject}'...")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = _bounded_map(executor, lambda page: get_page(_search_page_url(subject, page)), range(2, num_pages + 1))
+        for page, tree in results:
+            if tree is None:
+                print(f"Failed to fetch page {page}")
                 continue
-                
-            title = title_link.get_text().strip()
-            
-            # Get the full URL with edition key if present
-            href = title_link['href']
-            book_url = f"https://openlibrary.org{href}"
             
-            # Extract work key from URL (before any query parameters)
-            work_key = ""
-            if '/works/' in href:
-                # Extract work key (e.g., OL27448W from /works/OL27448W/The_Lord_of_the_Rings)
-                work_part = href.split('/works/')[-1]
-                work_key = work_part.split('/')[0].split('?')[0]  # Get just the work key part
-            
-            page_books.append({
-                'title': title,
-                'work_key': work_key,
-                'book_url': book_url
-            })
-        
-        books.extend(page_books)
-        print(f"Found {len(page_books)} books on page {page}")
-        
-        # Optional: Add a small delay between requests to be respectful        
-        time.sleep(0.5)
+            page_books = parse_search_results(tree)
+            books.extend(page_books)
+            print(f"Found {len(page_books)} books on page {page}")
     
-    print(f"Extracted {len(books)} total books for subject '{subject}' from {max_pages} pages")
+    print(f"Extracted {len(books)} total books for subject '{subject}' from {num_pages} pages")
     return books
 
 if __name__ == "__main__":
     book_search_list = crawl_openlibrary_books_by_subject('science_fiction', max_pages=1)
-    save_to_csv(book_search_list, 'books_science_fiction_search_temp.csv')
+    save_to_csv(book_search_list, 'books_science_fiction_search_temp.csv', SEARCH_FIELDS)
 
-    book_details = crawl_book_details_from_csv('books_science_fiction_search_temp.csv')
-    save_to_csv(book_details, 'books_science_fiction_detailed_temp.csv')
\ No newline at end of file
+    crawl_book_details_from_csv('books_science_fiction_search_temp.csv',
+                                output_file='books_science_fiction_detailed_temp.csv')
\ No newline at end of file